@@ -0,0 +1,27 @@
+"""
+ASGI entry point, for uvicorn or any other ASGI server:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 4 --lifespan off
+
+The Flask views stay synchronous. Each request runs on a pool of ASGI_THREADS threads
+while the event loop accepts connections and buffers request bodies (receipt uploads),
+so a slow proxy call or export only holds its own thread.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from app import create_app
+
+# asgiref's WsgiToAsgi runs every request on one shared thread (thread_sensitive=True),
+# which serialises the whole worker; use a real pool instead
+executor = ThreadPoolExecutor(max_workers=int(os.getenv('ASGI_THREADS', 16)), thread_name_prefix='asgi')
+
+class PooledInstance(WsgiToAsgiInstance):
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False, executor=executor)
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await PooledInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+application = PooledWsgiToAsgi(create_app())
@@ -0,0 +1,91 @@
+"""
+Throughput of the approval state engine (record_decision) against a real database.
+
+    python benchmarks/approval_engine.py --expenses 5000 --chain 3
+    python benchmarks/approval_engine.py --expenses 20000 --batch 500
+    python benchmarks/approval_engine.py --database-url mysql+pymysql://root@localhost/bench --reset
+
+Seeds one company with a `--chain`-long approver flow and `--expenses` expenses, then
+walks every chain to completion through record_decision() (or record_decisions() in groups of --batch, as
+/approvals/decide_batch does) and reports decisions/sec.
+Also reports the in-memory rate of rule_outcome(), the engine's evaluation step.
+Runs against a throwaway SQLite file unless --database-url is given; DATABASE_URL is ignored, so an
+exported application database is never touched. The run drops every table first, so an explicit
+--database-url also needs --reset.
+"""
+import argparse, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app as api
+from app import db, Company, User, Expense, Approval, CompanyApprover
+
+
+def seed(n_expenses, chain):
+    comp = Company(name='bench', currency='USD')
+    db.session.add(comp); db.session.flush()
+    approvers = [User(company_id=comp.id, name=f'a{i}', email=f'a{i}@bench', password_hash='x', role='manager') for i in range(chain)]
+    submitter = User(company_id=comp.id, name='e', email='e@bench', password_hash='x')
+    db.session.add_all(approvers + [submitter]); db.session.flush()
+    db.session.add_all([CompanyApprover(company_id=comp.id, approver_id=a.id, step_order=i) for i, a in enumerate(approvers, 1)])
+    exps = [Expense(company_id=comp.id, user_id=submitter.id, amount=1, currency='USD', amount_in_company_currency=1) for _ in range(n_expenses)]
+    for e in exps:
+        api.init_approval_counters(e, chain)
+    db.session.add_all(exps); db.session.flush()
+    db.session.execute(db.insert(Approval), [
+        {"expense_id": e.id, "approver_id": a.id, "sequence_order": seq, "status": 'pending' if seq == 1 else 'waiting'}
+        for e in exps for seq, a in enumerate(approvers, 1)
+    ])
+    db.session.commit()
+    return comp.id
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--expenses', type=int, default=2000)
+    ap.add_argument('--chain', type=int, default=3)
+    ap.add_argument('--batch', type=int, default=0, help='decide through record_decisions() in groups of this size')
+    ap.add_argument('--database-url', help='database to run against (default: a throwaway SQLite file)')
+    ap.add_argument('--reset', action='store_true', help='allow dropping every table in --database-url')
+    args = ap.parse_args()
+    if args.database_url and not args.reset:
+        ap.error('--database-url needs --reset: the run drops every table in it')
+    url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    with api.create_app({"SQLALCHEMY_DATABASE_URI": url}).app_context():
+        db.drop_all(); db.create_all()
+        company_id = seed(args.expenses, args.chain)
+
+        decisions = 0
+        start = time.perf_counter()
+        for _ in range(args.chain):
+            pending = db.session.query(Approval.id, Approval.approver_id, Approval.expense_id).filter_by(status='pending').all()
+            if args.batch:
+                by_approver = {}
+                for a in pending:
+                    by_approver.setdefault(a.approver_id, []).append((a.id, 'approve', None))
+                for approver_id, items in by_approver.items():
+                    for i in range(0, len(items), args.batch):
+                        results, _ = api.record_decisions(approver_id, items[i:i + args.batch])
+                        decisions += len(results)
+                continue
+            for a in pending:
+                api.record_decision(a.id, a.approver_id, a.expense_id, company_id, 'approve', None)
+                decisions += 1
+        elapsed = time.perf_counter() - start
+        approved = Expense.query.filter_by(status='approved').count()
+        mode = f'batches of {args.batch}' if args.batch else 'one commit per decision'
+        print(f'{db.engine.dialect.name} ({mode}): {decisions} decisions in {elapsed:.2f}s -> {decisions / elapsed:,.0f} decisions/s '
+              f'({approved}/{args.expenses} expenses approved)')
+
+        rule = api.compiled_rule(company_id)
+        n = 1_000_000
+        start = time.perf_counter()
+        for i in range(n):
+            api.rule_outcome(rule, args.chain, i % (args.chain + 1), 0, False)
+        elapsed = time.perf_counter() - start
+        print(f'rule_outcome: {n / elapsed:,.0f} evaluations/s')
+
+
+if __name__ == '__main__':
+    main()
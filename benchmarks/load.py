@@ -0,0 +1,329 @@
+"""
+Load test for the main API endpoints, in-process against a real database.
+
+    python benchmarks/load.py --expenses 100000 --concurrency 16 --duration 20
+    python benchmarks/load.py --database-url mysql+pymysql://root@localhost/bench --reset --expenses 2000000
+    python benchmarks/load.py --database-url mysql+pymysql://root@localhost/bench --no-seed --endpoints submit,decide \
+        --compare benchmarks/results/<old>.json
+
+Seeds `--companies` companies (an admin, `--chain` approvers, `--employees` employees each) and
+`--expenses` expenses spread across them, most already decided and `--pending` of them still waiting
+on their first approver. Seeding uses the models in app.py with chunked executemany inserts, so
+millions of rows are practical. Then drives each endpoint in turn (login, submit, pending, decide,
+all) from `--concurrency` threads through the WSGI app (no HTTP server) and reports per endpoint:
+requests, errors, req/s, p50/p95/p99 latency, and SQL statements and commits per request.
+
+Results are written as JSON (default benchmarks/results/<commit>-<dialect>.json); --compare prints the
+change against an earlier result file.
+
+Runs against a throwaway SQLite file unless --database-url is given; DATABASE_URL is ignored, so an
+exported application database is never touched. Seeding drops every table first, so an explicit
+--database-url also needs --reset (or --no-seed to reuse what an earlier --reset run left there).
+"""
+import argparse, json, os, platform, queue, random, subprocess, sys, tempfile, threading, time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import event, func
+from flask_jwt_extended import create_access_token
+import app as api
+from app import db, Company, User, Expense, Approval, CompanyApprover
+
+PASSWORD = 'bench'
+CHUNK = 10000
+ENDPOINTS = ('login', 'submit', 'pending', 'decide', 'all')
+CATEGORIES = ('travel', 'food', 'office', 'software', None)
+
+
+# --------------------
+# Seeding
+# --------------------
+def insert_chunked(table, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(db.insert(table), rows[i:i + CHUNK])
+
+def seed(args):
+    """Create the synthetic tenants. Ids are assigned here so expenses and approvals can be inserted without flushes."""
+    pw = api.password_hasher().hash(PASSWORD)
+    companies, users, approvers = [], [], []
+    uid = 0
+    for c in range(1, args.companies + 1):
+        companies.append({"id": c, "name": f'bench{c}', "currency": 'USD'})
+        uid += 1
+        users.append({"id": uid, "company_id": c, "name": 'admin', "email": f'admin{c}@bench', "password_hash": pw, "role": 'admin'})
+        chain = []
+        for i in range(args.chain):
+            uid += 1; chain.append(uid)
+            users.append({"id": uid, "company_id": c, "name": f'approver{i}', "email": f'approver{c}.{i}@bench', "password_hash": pw, "role": 'manager'})
+        approvers.append(chain)
+        for i in range(args.employees):
+            uid += 1
+            users.append({"id": uid, "company_id": c, "name": f'employee{i}', "email": f'employee{c}.{i}@bench', "password_hash": pw,
+                          "role": 'employee', "manager_id": chain[0] if chain else None})
+    insert_chunked(Company, companies)
+    insert_chunked(User, users)
+    insert_chunked(CompanyApprover, [{"company_id": c, "approver_id": a, "step_order": i}
+                                     for c, chain in enumerate(approvers, 1) for i, a in enumerate(chain, 1)])
+
+    employees = {}
+    for u in users:
+        if u['role'] == 'employee':
+            employees.setdefault(u['company_id'], []).append(u['id'])
+    rnd = random.Random(args.seed)
+    start = datetime.utcnow() - timedelta(days=365)
+    step = timedelta(days=365) / max(args.expenses, 1)
+    pending_from = args.expenses - int(args.expenses * args.pending)  # the newest expenses are the undecided ones
+    for lo in range(0, args.expenses, CHUNK):
+        expenses, approvals = [], []
+        for n in range(lo, min(lo + CHUNK, args.expenses)):
+            eid = n + 1; c = n % args.companies + 1; chain = approvers[c - 1]
+            created = start + step * n
+            amount = round(rnd.uniform(1, 500), 2)
+            pending = n >= pending_from
+            expenses.append({"id": eid, "company_id": c, "user_id": rnd.choice(employees[c]), "amount": amount, "currency": 'USD',
+                             "amount_in_company_currency": amount, "category": rnd.choice(CATEGORIES), "expense_date": created.date(),
+                             "status": 'pending' if pending else 'approved', "created_at": created,
+                             "approvals_total": len(chain), "approvals_approved": 0 if pending else len(chain),
+                             "approvals_rejected": 0, "specific_approved": False, "version": 0})
+            for seq, aid in enumerate(chain, 1):
+                status = ('pending' if seq == 1 else 'waiting') if pending else 'approved'
+                approvals.append({"expense_id": eid, "approver_id": aid, "sequence_order": seq, "status": status,
+                                  "decided_at": None if pending else created})
+        insert_chunked(Expense, expenses)
+        insert_chunked(Approval, approvals)
+        db.session.commit()
+        print(f'\rseeded {min(lo + CHUNK, args.expenses):,}/{args.expenses:,} expenses', end='', file=sys.stderr)
+    print(file=sys.stderr)
+    api.rebuild_spend_rollups()
+    db.session.commit()
+
+
+# --------------------
+# Instrumentation
+# --------------------
+class SqlCounter:
+    """Counts statements and commits per driving thread, attributed to the endpoint that thread is running."""
+    def __init__(self, engine):
+        self.local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._statement)
+        event.listen(engine, 'commit', self._commit)
+
+    def _statement(self, *a):
+        if getattr(self.local, 'stats', None) is not None:
+            self.local.stats[0] += 1
+
+    def _commit(self, *a):
+        if getattr(self.local, 'stats', None) is not None:
+            self.local.stats[1] += 1
+
+    def track(self, stats):
+        self.local.stats = stats
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+# --------------------
+# Scenarios
+# --------------------
+def tokens_for(rows):
+    return [(r.id, create_access_token(identity=r.id, additional_claims={"role": r.role, "company_id": r.company_id})) for r in rows]
+
+def build_scenarios(args):
+    """Each scenario returns a callable giving the next (method, path, json, token), or None when it has run out of work."""
+    rnd = random.Random(args.seed)
+    users = User.query.with_entities(User.id, User.role, User.company_id, User.email)
+    employees = users.filter(User.role == 'employee').limit(5000).all()
+    approvers = users.filter(User.role == 'manager').limit(5000).all()
+    admins = users.filter(User.role == 'admin').limit(5000).all()
+    employee_tokens, approver_tokens, admin_tokens = tokens_for(employees), dict(tokens_for(approvers)), tokens_for(admins)
+    lock = threading.Lock()
+
+    def login():
+        return 'POST', '/auth/login', {"email": rnd.choice(employees).email, "password": PASSWORD}, None
+
+    def submit():
+        return 'POST', '/expenses/submit', {"amount": round(rnd.uniform(1, 500), 2), "currency": 'USD', "category": rnd.choice(CATEGORIES),
+                                            "description": 'load test', "expense_date": date.today().isoformat()}, rnd.choice(employee_tokens)[1]
+
+    def pending():
+        return 'GET', '/approvals/pending?limit=50', None, approver_tokens[rnd.choice(approvers).id]
+
+    # only current-step approvals can be decided; take them newest first so later steps are exercised too
+    todo = queue.Queue()
+    for a in (Approval.query.with_entities(Approval.id, Approval.approver_id).filter(Approval.status == 'pending')
+              .filter(Approval.approver_id.in_(list(approver_tokens))).order_by(Approval.id.desc()).limit(args.decide_limit)):
+        todo.put(a)
+    def decide():
+        try:
+            a = todo.get_nowait()
+        except queue.Empty:
+            return None
+        with lock:
+            action = 'reject' if rnd.random() < 0.1 else 'approve'
+        return 'POST', f'/approvals/{a.id}/decide', {"action": action, "comment": 'load test'}, approver_tokens[a.approver_id]
+
+    def all_expenses():
+        return 'GET', '/expenses/all?limit=50', None, rnd.choice(admin_tokens)[1]
+
+    # random.Random is not thread safe; serialise the picks (they are trivial next to a request)
+    def locked(fn):
+        def pick():
+            with lock:
+                return fn()
+        return pick
+    return {"login": locked(login), "submit": locked(submit), "pending": locked(pending), "decide": decide, "all": locked(all_expenses)}
+
+def drive(app, counter, next_request, args):
+    latencies, errors, stats = [], [0], [0, 0]
+    results_lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker():
+        client = app.test_client()
+        mine, my_stats, my_errors = [], [0, 0], 0
+        counter.track(my_stats)
+        while time.perf_counter() < deadline and (not args.requests or len(latencies) + len(mine) < args.requests):
+            req = next_request()
+            if req is None:
+                break
+            method, path, body, token = req
+            headers = {"Authorization": "Bearer " + token} if token else {}
+            t = time.perf_counter()
+            resp = client.open(path, method=method, json=body, headers=headers)
+            mine.append(time.perf_counter() - t)
+            if resp.status_code >= 400:
+                my_errors += 1
+        counter.track(None)
+        with results_lock:
+            latencies.extend(mine); errors[0] += my_errors
+            stats[0] += my_stats[0]; stats[1] += my_stats[1]
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    n = len(latencies)
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    return {
+        "requests": n, "errors": errors[0], "seconds": round(elapsed, 3),
+        "throughput_rps": round(n / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)), "p95_ms": ms(percentile(latencies, 0.95)), "p99_ms": ms(percentile(latencies, 0.99)),
+        "sql_per_request": round(stats[0] / n, 2) if n else None, "commits_per_request": round(stats[1] / n, 2) if n else None,
+    }
+
+
+# --------------------
+# Reporting
+# --------------------
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+COLUMNS = ('requests', 'errors', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'sql_per_request', 'commits_per_request')
+
+def print_table(results, previous=None):
+    print(f"{'endpoint':<10}" + ''.join(f'{c:>20}' for c in COLUMNS))
+    for name, r in results.items():
+        cells = []
+        for c in COLUMNS:
+            cell = '-' if r[c] is None else f'{r[c]:g}'
+            old = (previous or {}).get(name, {}).get(c)
+            if old and r[c] is not None:
+                cell += f' ({(r[c] - old) / old:+.0%})'
+            cells.append(f'{cell:>20}')
+        print(f'{name:<10}' + ''.join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--companies', type=int, default=10)
+    ap.add_argument('--employees', type=int, default=50, help='employees per company')
+    ap.add_argument('--chain', type=int, default=3, help='approvers per company flow')
+    ap.add_argument('--expenses', type=int, default=100000)
+    ap.add_argument('--pending', type=float, default=0.05, help='fraction of seeded expenses still awaiting approval')
+    ap.add_argument('--database-url', help='database to load (default: a throwaway SQLite file)')
+    ap.add_argument('--reset', action='store_true', help='drop every table in --database-url and seed it')
+    ap.add_argument('--no-seed', action='store_true', help='reuse the data already in --database-url')
+    ap.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--duration', type=float, default=10, help='seconds per endpoint')
+    ap.add_argument('--requests', type=int, default=0, help='stop an endpoint after this many requests (0: duration only)')
+    ap.add_argument('--decide-limit', type=int, default=50000, help='pending approvals queued for the decide phase')
+    ap.add_argument('--seed', type=int, default=1, help='random seed')
+    ap.add_argument('--response-cache', default='off', help="RESPONSE_CACHE for the run (default off: measure the queries, not the cache)")
+    ap.add_argument('--out', help='result file (default benchmarks/results/<commit>-<dialect>.json)')
+    ap.add_argument('--compare', help='earlier result file to diff against')
+    args = ap.parse_args()
+    endpoints = [e for e in args.endpoints.split(',') if e]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        ap.error(f'unknown endpoints: {", ".join(sorted(unknown))}')
+    if args.reset and args.no_seed:
+        ap.error('--reset and --no-seed are exclusive')
+    if args.database_url:
+        if not (args.reset or args.no_seed):
+            ap.error('--database-url needs --reset (drop all tables and seed) or --no-seed (reuse its data)')
+        url = args.database_url
+    elif args.no_seed:
+        ap.error('--no-seed needs --database-url')
+    else:
+        url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load.db')
+
+    # one client address and a handful of emails: the login limiter would turn the run into a 429 benchmark
+    app = api.create_app({"SQLALCHEMY_DATABASE_URI": url, "JWT_ACCESS_TOKEN_EXPIRES": False, "LOGIN_RATE_IP": "0",
+                          "LOGIN_RATE_EMAIL": "0", "RESPONSE_CACHE": args.response_cache})
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            # concurrent writers wait for the lock instead of failing
+            @event.listens_for(db.engine, 'connect')
+            def _sqlite_pragmas(conn, _):
+                conn.execute('PRAGMA journal_mode=WAL'); conn.execute('PRAGMA busy_timeout=30000')
+            db.engine.dispose()
+        if not args.no_seed:
+            db.drop_all(); db.create_all()
+            t = time.perf_counter()
+            seed(args)
+            print(f'seeding took {time.perf_counter() - t:.1f}s', file=sys.stderr)
+        counts = {"companies": Company.query.count(), "users": User.query.count(),
+                  "expenses": db.session.query(func.count(Expense.id)).scalar(), "approvals": db.session.query(func.count(Approval.id)).scalar()}
+        scenarios = build_scenarios(args)
+        counter = SqlCounter(db.engine)
+        db.session.remove()
+
+    results = {}
+    for name in endpoints:
+        print(f'driving {name} ...', file=sys.stderr)
+        results[name] = drive(app, counter, scenarios[name], args)
+    app.extensions['audit_writer'].flush()
+
+    report = {
+        "commit": git_commit(), "dialect": dialect, "timestamp": datetime.utcnow().isoformat(timespec='seconds'),
+        "python": platform.python_version(), "cpus": os.cpu_count(),
+        "config": {k: getattr(args, k) for k in ('concurrency', 'duration', 'requests', 'companies', 'employees', 'chain', 'expenses', 'pending', 'response_cache')},
+        "dataset": counts, "endpoints": results,
+    }
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', f"{report['commit']}-{dialect}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['endpoints']
+    print_table(results, previous)
+    print(f'results written to {out}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
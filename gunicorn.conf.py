@@ -0,0 +1,19 @@
+# Production WSGI server config:  gunicorn -c gunicorn.conf.py
+# Every route blocks on the database or on outbound HTTP, so workers are threaded (gthread):
+# WEB_CONCURRENCY processes x GUNICORN_THREADS threads, each thread holding at most one
+# pooled DB connection (keep DB_POOL_SIZE + DB_MAX_OVERFLOW >= GUNICORN_THREADS).
+import multiprocessing, os
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('BIND') or f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+# receipt uploads and exports can legitimately take a while
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers now and then so slow leaks can't accumulate
+max_requests = 10000
+max_requests_jitter = 1000
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
@@ -0,0 +1,87 @@
+import os, sys, threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import app as api
+from app import db, Company, User, CompanyApprover
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app = api.create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "TESTING": True,
+        "RESPONSE_CACHE": "off",
+        # keep audit rows buffered: the writer thread would share the in-memory database's only connection
+        "AUDIT_FLUSH_INTERVAL": 3600,
+    })
+    with flask_app.app_context():
+        db.create_all()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def company(app):
+    """A fresh company: an admin, `approvers` in step order and one employee. Ids never repeat, so the per-process caches stay valid."""
+    def make(approvers=1, currency='USD'):
+        with app.app_context():
+            comp = Company(name='test', currency=currency)
+            db.session.add(comp); db.session.flush()
+            def user(name, role):
+                u = User(company_id=comp.id, name=name, email=f'{name}@{comp.id}.test', password_hash='x', role=role)
+                db.session.add(u); db.session.flush()
+                return SimpleNamespace(id=u.id, role=role, headers={"Authorization": "Bearer " + create_access_token(
+                    identity=u.id, additional_claims={"role": role, "company_id": comp.id})})
+            admin = user('admin', 'admin')
+            chain = [user(f'approver{i}', 'manager') for i in range(approvers)]
+            employee = user('employee', 'employee')
+            db.session.add_all([CompanyApprover(company_id=comp.id, approver_id=a.id, step_order=i) for i, a in enumerate(chain, 1)])
+            db.session.commit()
+            return SimpleNamespace(id=comp.id, admin=admin, approvers=chain, employee=employee)
+    return make
+
+
+@pytest.fixture
+def deferred_refreshes(monkeypatch):
+    """Record refresh_rates() calls made while serving a request instead of starting the thread."""
+    calls = []
+    def record(base, wait=False, timeout=None):
+        calls.append((base, not db.session().in_transaction()))  # True: the submit has committed
+    monkeypatch.setattr(api, 'refresh_rates', record)
+    return calls
+
+
+@pytest.fixture
+def statements(app):
+    """collect() yields the list of SQL statements run by this thread inside the block."""
+    @contextmanager
+    def collect():
+        seen = []; tid = threading.get_ident()
+        def before(conn, cursor, statement, parameters, context, executemany):
+            if threading.get_ident() == tid:
+                seen.append(statement)
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before)
+        try:
+            yield seen
+        finally:
+            event.remove(engine, 'before_cursor_execute', before)
+    return collect
+
+
+def submit(client, who, amount=10, **fields):
+    body = {"amount": amount, "currency": "USD", "category": "travel", "expense_date": "2024-03-01", **fields}
+    r = client.post('/expenses/submit', json=body, headers=who.headers)
+    assert r.status_code == 201, r.json
+    return r.json['expense_id']
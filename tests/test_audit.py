@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+import app as api
+from app import db, AuditLog
+
+
+@pytest.fixture
+def writer_app(tmp_path):
+    """A file-backed app (the writer thread needs its own connection) whose partial batches would wait an hour."""
+    def make(**config):
+        app = api.create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'audit.db'}", "RESPONSE_CACHE": "off",
+                              "AUDIT_BATCH": 3, "AUDIT_FLUSH_INTERVAL": 3600, **config})
+        with app.app_context():
+            db.create_all()
+        return app
+    return make
+
+
+def row(n):
+    return {"company_id": None, "user_id": None, "action": f'a{n}', "details": None, "created_at": api.datetime.utcnow()}
+
+
+def stored(app):
+    with app.app_context():
+        return sorted(a.action for a in AuditLog.query)
+
+
+def test_a_full_batch_is_written_without_waiting_for_the_interval(writer_app):
+    app = writer_app()
+    writer = api.AuditWriter()
+    with app.app_context():
+        for n in range(3):
+            writer.write(row(n))
+    deadline = time.monotonic() + 5
+    while len(stored(app)) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stored(app) == ['a0', 'a1', 'a2']
+
+
+def test_a_full_queue_drops_and_counts_rows_and_flush_writes_the_rest(writer_app):
+    app = writer_app(AUDIT_QUEUE=2, AUDIT_WAIT=0)
+    writer = api.AuditWriter()
+    before = api.audit_rows_dropped._values[('queue_full',)]
+    with app.app_context():
+        writer.write(row(0))
+        while writer._queue.unfinished_tasks and writer._queue.qsize():
+            time.sleep(0.01)  # the writer thread holds a0 in a partial batch
+        for n in range(1, 4):
+            writer.write(row(n))  # a1 and a2 fill the queue; a3 is dropped
+    assert api.audit_rows_dropped._values[('queue_full',)] == before + 1
+    writer.flush(timeout=5)
+    assert stored(app) == ['a0', 'a1', 'a2']
@@ -0,0 +1,48 @@
+import pytest
+
+import app as api
+
+
+@pytest.mark.parametrize('body', [{"email": 1, "password": "x"}, {"email": "a@b.test", "password": 1234}, {"email": ["a"], "password": "x"}])
+def test_login_rejects_non_string_credentials(client, body):
+    assert client.post('/auth/login', json=body).status_code == 400
+
+
+@pytest.mark.parametrize('field, value', [('password', 1234), ('email', {"a": 1}), ('name', 5), ('currency', 7)])
+def test_register_rejects_non_string_fields(client, field, value):
+    body = {"company_name": "acme", "name": "A", "email": "reg@auth.test", "password": "pw", field: value}
+    assert client.post('/auth/register', json=body).status_code == 400
+
+
+@pytest.fixture
+def limiter(app, monkeypatch):
+    """A fresh bucket store; set(key, rate) changes one of the login limits for this test."""
+    monkeypatch.setitem(app.extensions, 'rate_store', api.MemoryBucketStore())
+    return lambda key, rate: monkeypatch.setitem(app.config, key, rate)
+
+
+def login(client, email):
+    return client.post('/auth/login', json={"email": email, "password": "wrong"})
+
+
+def test_login_is_limited_per_email_with_retry_after(client, limiter):
+    limiter('LOGIN_RATE_EMAIL', '2/60')
+    assert [login(client, 'Victim@limit.test').status_code for _ in range(2)] == [401, 401]
+    r = login(client, ' victim@limit.test')  # the bucket key is normalised
+    assert r.status_code == 429 and 1 <= int(r.headers['Retry-After']) <= 30
+    assert login(client, 'other@limit.test').status_code == 401
+
+
+def test_login_is_limited_per_ip(client, limiter):
+    limiter('LOGIN_RATE_IP', '1/60')
+    assert login(client, 'a@limit.test').status_code == 401
+    r = login(client, 'b@limit.test')
+    assert r.status_code == 429 and r.headers['Retry-After'] == '60'
+
+
+def test_a_failing_rate_store_lets_logins_through(app, client, monkeypatch):
+    class Down:
+        def take(self, key, capacity, period):
+            raise ConnectionError('redis down')
+    monkeypatch.setitem(app.extensions, 'rate_store', Down())
+    assert login(client, 'a@limit.test').status_code == 401
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import app as api
+
+
+def test_cache_lifetimes_come_from_the_app_config(app):
+    saved = api._user_cache.ttl, api._rate_cache.ttl
+    try:
+        api.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "USER_CACHE_TTL": 7, "RATE_CACHE_TTL": 11})
+        assert (api._user_cache.ttl, api._rate_cache.ttl) == (7, 11)
+    finally:
+        api._user_cache.ttl, api._rate_cache.ttl = saved
+
+
+def test_each_app_has_its_own_services(tmp_path):
+    apps = [api.create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / name}.db", "RESPONSE_CACHE": "off",
+                            "AUDIT_FLUSH_INTERVAL": 0}) for name in ('a', 'b')]
+    for app in apps:
+        with app.app_context():
+            api.db.create_all()
+    a, b = apps
+    assert a.extensions['audit_writer'] is not b.extensions['audit_writer']
+    assert a.extensions['blob_store'] is not b.extensions['blob_store']
+    with b.app_context():
+        api.audit(SimpleNamespace(id=None, company_id=None), 'only in b')
+        api.audit_writer().flush()
+    with a.app_context():
+        assert api.AuditLog.query.count() == 0
+    with b.app_context():
+        assert [r.action for r in api.AuditLog.query] == ['only in b']
@@ -0,0 +1,25 @@
+from conftest import submit
+
+from app import db, Approval, Expense
+
+
+def test_batch_recount_of_legacy_expenses_credits_the_specific_approver(app, client, company):
+    c = company(approvers=2)
+    first, second = c.approvers
+    eids = [submit(client, c.employee) for _ in range(2)]
+    with app.app_context():
+        steps = {e: [a.id for a in Approval.query.filter_by(expense_id=e).order_by(Approval.sequence_order)] for e in eids}
+    for e in eids:
+        r = client.post(f'/approvals/{steps[e][0]}/decide', json={"action": "approve"}, headers=first.headers)
+        assert r.json['final_status'] == 'pending'
+    r = client.post('/company/approval_rule', json={"rule_type": "specific", "specific_approver_id": first.id}, headers=c.admin.headers)
+    assert r.status_code == 200
+    with app.app_context():
+        # as if both expenses predate the stored counters
+        Expense.query.filter(Expense.id.in_(eids)).update({Expense.approvals_total: None}, synchronize_session=False)
+        db.session.commit()
+
+    single = client.post(f'/approvals/{steps[eids[0]][1]}/decide', json={"action": "reject"}, headers=second.headers)
+    batch = client.post('/approvals/decide_batch', json={"decisions": [{"approval_id": steps[eids[1]][1], "action": "reject"}]},
+                        headers=second.headers)
+    assert single.json['final_status'] == batch.json['results'][0]['final_status'] == 'approved'
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import Approval
+from conftest import submit
+
+
+def delegate(client, who, delegate_id, days=7, **fields):
+    body = {"delegate_id": delegate_id, "ends_at": (datetime.utcnow() + timedelta(days=days)).isoformat(), **fields}
+    return client.post('/delegations', json=body, headers=who.headers)
+
+
+def inbox(client, who):
+    return [r['expense_id'] for r in client.get('/approvals/pending', headers=who.headers).json]
+
+
+def chain(app, expense_id):
+    with app.app_context():
+        return [(a.approver_id, a.delegated_from) for a in Approval.query.filter_by(expense_id=expense_id).order_by(Approval.sequence_order)]
+
+
+def test_new_approvals_follow_a_delegation_until_it_is_revoked(app, client, company):
+    c = company()
+    approver, stand_in = c.approvers[0], c.admin
+    before = submit(client, c.employee)
+    r = delegate(client, approver, stand_in.id, reason='holiday')
+    assert r.status_code == 201
+    during = submit(client, c.employee)
+    assert inbox(client, approver) == [before]  # approvals already assigned stay put
+    assert inbox(client, stand_in) == [during]
+    assert chain(app, during) == [(stand_in.id, approver.id)]
+    listed = client.get('/delegations', headers=approver.headers).json
+    assert [(d['id'], d['delegate_id'], d['reason']) for d in listed] == [(r.json['delegation_id'], stand_in.id, 'holiday')]
+
+    assert client.delete(f"/delegations/{r.json['delegation_id']}", headers=approver.headers).status_code == 200
+    after = submit(client, c.employee)
+    assert inbox(client, approver) == [before, after]
+    assert client.get('/delegations', headers=approver.headers).json == []
+
+
+def test_the_delegate_decides_for_the_approver(client, company):
+    c = company()
+    delegate(client, c.approvers[0], c.admin.id)
+    submit(client, c.employee)
+    approval_id = client.get('/approvals/pending', headers=c.admin.headers).json[0]['approval_id']
+    r = client.post(f'/approvals/{approval_id}/decide', json={"action": "approve"}, headers=c.admin.headers)
+    assert r.json['final_status'] == 'approved'
+
+
+def test_delegations_chain_and_collapse_duplicate_steps(app, client, company):
+    c = company(approvers=3)
+    a, b, d = c.approvers
+    delegate(client, a, b.id)
+    delegate(client, b, c.admin.id)
+    # a -> b -> admin; b's own step also goes to the admin and is dropped as a repeat
+    assert chain(app, submit(client, c.employee)) == [(c.admin.id, a.id), (d.id, None)]
+
+
+def test_a_future_delegation_does_not_route_yet(app, client, company):
+    c = company()
+    starts = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    assert delegate(client, c.approvers[0], c.admin.id, days=3, starts_at=starts).status_code == 201
+    assert chain(app, submit(client, c.employee)) == [(c.approvers[0].id, None)]
+
+
+@pytest.mark.parametrize('case, status', [('for someone else', 403), ('to self', 400), ('ends before it starts', 400), ('other company', 400)])
+def test_delegation_validation(client, company, case, status):
+    c, other = company(), company()
+    approver = c.approvers[0]
+    r = {
+        'for someone else': lambda: delegate(client, c.employee, c.admin.id, approver_id=approver.id),
+        'to self': lambda: delegate(client, approver, approver.id),
+        'ends before it starts': lambda: delegate(client, approver, c.admin.id, days=-1),
+        'other company': lambda: delegate(client, approver, other.admin.id),
+    }[case]()
+    assert r.status_code == status
+
+
+def test_only_the_approver_or_an_admin_can_revoke(client, company):
+    c = company()
+    delegation_id = delegate(client, c.approvers[0], c.admin.id).json['delegation_id']
+    assert client.delete(f'/delegations/{delegation_id}', headers=c.employee.headers).status_code == 404
+    assert client.delete(f'/delegations/{delegation_id}', headers=c.admin.headers).status_code == 200
@@ -0,0 +1,74 @@
+import json
+import time
+from datetime import date
+from decimal import Decimal
+
+import app as api
+from app import db, Expense, ExchangeRate
+from conftest import submit
+
+
+def expense_amount(app, eid):
+    with app.app_context():
+        return db.session.get(Expense, eid).amount_in_company_currency
+
+
+def test_refresh_after_commit_converts_the_first_expense(app, client, company, deferred_refreshes, monkeypatch, tmp_path):
+    rates = tmp_path / 'rates.json'
+    rates.write_text(json.dumps({"CHF": {"date": date.today().isoformat(), "rates": {"USD": 1.25}}}))
+    monkeypatch.setitem(app.config, 'RATE_PROVIDER', f'file:{rates}')
+    c = company()
+    eid = submit(client, c.employee, amount='8.00', currency='CHF')
+    assert expense_amount(app, eid) is None
+    assert deferred_refreshes == [('CHF', True)]
+
+    monkeypatch.undo()
+    monkeypatch.setitem(app.config, 'RATE_PROVIDER', f'file:{rates}')
+    with app.app_context():
+        assert api.refresh_rates('CHF', wait=True, timeout=10).is_set()
+    assert expense_amount(app, eid) == Decimal('10.00')
+
+
+def test_rates_stored_by_another_process_are_used_and_backfilled(app, client, company, deferred_refreshes, monkeypatch):
+    c = company()
+    eid = submit(client, c.employee, amount='2.00', currency='SEK')
+    assert expense_amount(app, eid) is None
+    with app.app_context():
+        # as if another worker fetched today's rates: this process never saw them
+        db.session.add(ExchangeRate(base='SEK', quote='USD', rate_date=date.today(), rate=Decimal('0.1'), fetched_at=api.datetime.utcnow()))
+        db.session.commit()
+        assert api.lookup_rate('SEK', 'USD') == Decimal('0.1')  # the earlier miss was not cached
+
+    monkeypatch.undo()
+    monkeypatch.setitem(app.config, 'RATE_PROVIDER', 'file:/nonexistent.json')  # must not be needed
+    with app.app_context():
+        api.refresh_rates('SEK', wait=True, timeout=10)
+    assert expense_amount(app, eid) == Decimal('0.20')
+
+
+def test_exchange_proxy_rejects_a_malformed_base_before_any_lookup(client, deferred_refreshes):
+    assert client.get('/proxy/exchange/ab%3Fx').status_code == 400
+    assert client.get('/proxy/exchange/EURO').status_code == 400
+    assert deferred_refreshes == []
+
+
+def test_stale_exchange_rates_are_refreshed_and_backfilled_once(app, client, monkeypatch, tmp_path):
+    yesterday = date.today() - api.timedelta(days=1)
+    with app.app_context():
+        api.store_rates('DKK', yesterday, {"USD": Decimal('0.15')})
+    rates = tmp_path / 'rates.json'
+    rates.write_text(json.dumps({"DKK": {"date": yesterday.isoformat(), "rates": {"USD": 0.15}}}))  # the provider lags a day
+    monkeypatch.setitem(app.config, 'RATE_PROVIDER', f'file:{rates}')
+    fetches, backfills = [], []
+    provider = api.get_rate_provider
+    monkeypatch.setattr(api, 'get_rate_provider', lambda: fetches.append(1) or provider())
+    backfill = api.backfill_conversions
+    monkeypatch.setattr(api, 'backfill_conversions', lambda base: backfills.append(base) or backfill(base))
+
+    for _ in range(5):
+        r = client.get('/proxy/exchange/dkk')
+        assert r.status_code == 200 and r.json['rates'] == {"USD": 0.15}
+        while 'DKK' in api._refreshing:
+            time.sleep(0.01)
+    assert fetches == [1]
+    assert backfills == ['DKK']  # after the fetch that stored rates, not for every throttled refresh
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.mark.parametrize('amount', ['Infinity', '-Infinity', 'NaN', 'sNaN', '-5', '0.00', '1e20', 10 ** 10, 'abc'])
+def test_submit_rejects_invalid_amounts(client, company, amount):
+    c = company()
+    r = client.post('/expenses/submit', json={"amount": amount, "currency": "USD"}, headers=c.employee.headers)
+    assert r.status_code == 400, r.json
+
+
+def test_batch_reports_invalid_amounts_per_item(client, company):
+    c = company()
+    items = [{"amount": a, "currency": "USD"} for a in ('10', 'Infinity', 'NaN', '-1', '1e20', '9999999999.99')]
+    r = client.post('/expenses/submit_batch', json={"expenses": items}, headers=c.employee.headers)
+    assert r.status_code == 201
+    assert r.json['submitted'] == 2
+    assert [('expense_id' in res) for res in r.json['results']] == [True, False, False, False, False, True]
+
+
+def test_batch_reports_malformed_text_fields_per_item(client, company):
+    c = company()
+    items = [{"amount": 1, "category": {"x": 1}}, {"amount": 1, "description": ["a"]}, {"amount": 1, "category": "x" * 101},
+             {"amount": 1, "category": "travel", "description": "taxi"}]
+    r = client.post('/expenses/submit_batch', json={"expenses": items}, headers=c.employee.headers)
+    assert r.status_code == 201
+    assert [res.get('error', '').split(' must')[0] for res in r.json['results']] == ['category', 'description', 'category', '']
+    assert r.json['submitted'] == 1 and 'expense_id' in r.json['results'][3]
+
+
+def test_batch_does_not_reload_expenses_after_commit(client, company, statements):
+    c = company(approvers=2)
+    client.post('/expenses/submit_batch', json={"expenses": [{"amount": 5, "currency": "USD"}]}, headers=c.employee.headers)  # warm the caches
+    selects = []
+    for n in (1, 40):
+        with statements() as seen:
+            r = client.post('/expenses/submit_batch', json={"expenses": [{"amount": 5, "currency": "USD"}] * n}, headers=c.employee.headers)
+        assert r.json['submitted'] == n and all(res['expense_id'] for res in r.json['results'])
+        selects.append(sum(1 for s in seen if s.lstrip().upper().startswith('SELECT')))
+    assert selects[0] == selects[1]
@@ -0,0 +1,59 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as api
+from app import db, AuditLog
+from conftest import submit
+
+
+def read_csv(resp):
+    assert resp.status_code == 200 and resp.mimetype == 'text/csv'
+    return list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+
+
+def test_expense_export_streams_oldest_first_and_resumes_from_a_cursor(client, company, monkeypatch):
+    monkeypatch.setattr(api, 'EXPORT_BATCH', 2)  # several chunks
+    c, other = company(), company()
+    ids = [submit(client, c.employee, amount=n, category='travel') for n in range(1, 6)]
+    submit(client, other.employee)
+    rows = read_csv(client.get('/export/expenses', headers=c.admin.headers))
+    assert [int(r['id']) for r in rows] == ids
+    assert list(rows[0]) == list(api.EXPENSE_EXPORT_FIELDS) and rows[0]['amount'] == '1.00'
+    rest = read_csv(client.get(f"/export/expenses?cursor={rows[1]['cursor']}", headers=c.admin.headers))
+    assert [int(r['id']) for r in rest] == ids[2:]
+
+
+def test_approval_export_as_gzipped_ndjson(client, company):
+    c = company(approvers=2)
+    eids = [submit(client, c.employee) for _ in range(3)]
+    r = client.get('/export/approvals?format=ndjson', headers={**c.admin.headers, 'Accept-Encoding': 'gzip'})
+    assert (r.status_code, r.headers['Content-Encoding'], r.mimetype) == (200, 'gzip', 'application/x-ndjson')
+    rows = [json.loads(line) for line in gzip.decompress(r.data).decode().splitlines()]
+    assert [(row['expense_id'], row['sequence_order'], row['status']) for row in rows] == [
+        (e, seq, status) for e in eids for seq, status in ((1, 'pending'), (2, 'waiting'))]
+    after = client.get(f"/export/approvals?format=ndjson&status=waiting&cursor={rows[0]['cursor']}", headers=c.admin.headers)
+    assert [json.loads(line)['expense_id'] for line in after.get_data(as_text=True).splitlines()] == eids
+
+
+def test_audit_export_filters_by_user_and_action(app, client, company):
+    c = company()
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        db.session.add_all([AuditLog(company_id=c.id, user_id=uid, action=action, details=str(n), created_at=start + timedelta(minutes=n))
+                            for n, (uid, action) in enumerate([(c.admin.id, 'a'), (c.employee.id, 'a'), (c.admin.id, 'b'), (c.admin.id, 'a')])])
+        db.session.commit()
+    rows = read_csv(client.get(f'/export/audit?user_id={c.admin.id}&action=a', headers=c.admin.headers))
+    assert [r['details'] for r in rows] == ['0', '3']
+
+
+@pytest.mark.parametrize('path', ['/export/expenses', '/export/approvals', '/export/audit'])
+def test_exports_are_admin_only_and_validate_arguments(client, company, path):
+    c = company()
+    assert client.get(path, headers=c.employee.headers).status_code == 403
+    assert client.get(f'{path}?format=xml', headers=c.admin.headers).status_code == 400
+    assert client.get(f'{path}?cursor=!!', headers=c.admin.headers).status_code == 400
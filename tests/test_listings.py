@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+from app import db, Expense
+from conftest import submit
+
+
+def pages(client, url, headers, limit):
+    rows, cursor, sep = [], None, '&' if '?' in url else '?'
+    while True:
+        r = client.get(f'{url}{sep}limit={limit}' + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert r.status_code == 200
+        rows += r.json
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            return rows
+
+
+@pytest.mark.parametrize('url, who', [('/expenses/my', 'employee'), ('/expenses/all', 'admin')])
+def test_cursor_pages_cover_every_expense_once_newest_first(app, client, company, url, who):
+    c = company()
+    ids = [submit(client, c.employee) for _ in range(7)]
+    with app.app_context():
+        # rows sharing a created_at are ordered by id, across page boundaries too
+        same = datetime(2024, 5, 1, 12, 0)
+        Expense.query.filter(Expense.id.in_(ids[1:5])).update({Expense.created_at: same}, synchronize_session=False)
+        db.session.commit()
+        expected = [e.id for e in Expense.query.filter(Expense.id.in_(ids)).order_by(Expense.created_at.desc(), Expense.id.desc())]
+    rows = pages(client, url, getattr(c, who).headers, 2)
+    assert [r['id'] for r in rows] == expected
+
+
+@pytest.mark.parametrize('query', ['cursor=not-a-cursor', 'limit=abc'])
+def test_malformed_paging_arguments_are_400(client, company, query):
+    c = company()
+    assert client.get(f'/expenses/my?{query}', headers=c.employee.headers).status_code == 400
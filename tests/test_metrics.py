@@ -0,0 +1,48 @@
+from conftest import submit
+
+SUBMIT = 'endpoint="api.submit_expense"'
+
+
+def scrape(client, headers=None):
+    r = client.get('/metrics', headers=headers)
+    assert r.status_code == 200 and r.mimetype == 'text/plain'
+    samples = {}
+    for line in r.get_data(as_text=True).splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def delta(before, after, name):
+    return after.get(name, 0) - before.get(name, 0)
+
+
+def test_a_request_is_counted_timed_and_its_queries_recorded(app, client, company, monkeypatch):
+    c = company()
+    before = scrape(client)
+    monkeypatch.setitem(app.config, 'N_PLUS_ONE_THRESHOLD', 1)  # any statement at all is flagged
+    submit(client, c.employee)
+    after = scrape(client)
+    assert delta(before, after, f'http_requests_total{{{SUBMIT},method="POST",status="201"}}') == 1
+    assert delta(before, after, f'http_request_duration_seconds_count{{{SUBMIT},method="POST"}}') == 1
+    assert delta(before, after, f'db_queries_per_request_count{{{SUBMIT}}}') == 1
+    assert delta(before, after, f'db_queries_per_request_sum{{{SUBMIT}}}') >= 2
+    assert delta(before, after, f'db_commits_total{{{SUBMIT}}}') >= 1
+    assert delta(before, after, f'db_n_plus_one_total{{{SUBMIT}}}') == 1
+
+
+def test_histogram_buckets_are_cumulative(client, company):
+    submit(client, company().employee)
+    samples = scrape(client)
+    prefix = f'http_request_duration_seconds_bucket{{{SUBMIT},method="POST",le='
+    buckets = [v for k, v in samples.items() if k.startswith(prefix)]
+    assert buckets == sorted(buckets) and len(buckets) == 12
+    assert samples[prefix + '"+Inf"}'] == samples[f'http_request_duration_seconds_count{{{SUBMIT},method="POST"}}']
+
+
+def test_metrics_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 's3cret')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert 'http_requests_total' in ''.join(scrape(client, {'Authorization': 'Bearer s3cret'}))
@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as api
+
+
+class CountingPool(ThreadPoolExecutor):
+    """Thread stand-in for the process pool that records the most tasks outstanding at once."""
+    def __init__(self, workers):
+        super().__init__(max_workers=workers)
+        self.outstanding = self.most = 0
+        self._count = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._count:
+            self.outstanding += 1; self.most = max(self.most, self.outstanding)
+        fut = super().submit(fn, *args)
+        fut.add_done_callback(self._done)
+        return fut
+
+    def _done(self, _):
+        with self._count:
+            self.outstanding -= 1
+
+
+@pytest.fixture
+def hasher(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_WORKERS', 2)
+    monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 5)
+    h = api.PasswordHasher()
+    h._pool = CountingPool(2)
+    yield h
+    h._pool.shutdown()
+
+
+def test_an_import_keeps_one_chunk_per_worker_in_flight(app, hasher):
+    with app.app_context():
+        hashes = hasher.hash_many([f'pw{i}' for i in range(40)], 4)
+    assert len(hashes) == 40 and hashes[0].startswith('$2b$04$')
+    assert api.bcrypt_lib.checkpw(b'pw39', hashes[39].encode())
+    assert hasher._pool.most == 2  # chunks of 2 ** (5 - 4) passwords, never more than the workers
+
+
+def test_a_caller_gives_up_after_password_wait(app, hasher, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_WAIT', 0.1)
+    with app.app_context():
+        with pytest.raises(api.PasswordBusy):
+            hasher._run(time.sleep, 1)
@@ -0,0 +1,35 @@
+from conftest import submit
+
+
+def test_pending_returns_the_inbox_with_expense_fields(client, company):
+    c = company()
+    eid = submit(client, c.employee, amount='12.50', description='taxi')
+    rows = client.get('/approvals/pending', headers=c.approvers[0].headers).json
+    assert [(r['expense_id'], r['amount'], r['description'], r['sequence_order']) for r in rows] == [(eid, '12.50', 'taxi', 1)]
+
+
+def test_pending_statement_count_does_not_grow_with_the_inbox(client, company, statements):
+    small, large = company(), company()
+    submit(client, small.employee)
+    for _ in range(25):
+        submit(client, large.employee)
+
+    with statements() as one:
+        r = client.get('/approvals/pending', headers=small.approvers[0].headers)
+    assert len(r.json) == 1
+    with statements() as many:
+        r = client.get('/approvals/pending', headers=large.approvers[0].headers)
+    assert len(r.json) == 25
+    assert len(many) == len(one) == 1
+
+
+def test_pending_pages_with_a_cursor_at_one_statement_per_page(client, company, statements):
+    c = company()
+    ids = [submit(client, c.employee) for _ in range(5)]
+    headers = c.approvers[0].headers
+    first = client.get('/approvals/pending?limit=3', headers=headers)
+    with statements() as seen:
+        second = client.get('/approvals/pending?limit=3&cursor=' + first.headers['X-Next-Cursor'], headers=headers)
+    assert len(seen) == 1
+    assert [r['expense_id'] for r in first.json + second.json] == ids
+    assert 'X-Next-Cursor' not in second.headers
@@ -0,0 +1,39 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import app as api
+
+
+def test_cold_countries_cache_fetches_once_for_concurrent_callers(app, monkeypatch, tmp_path):
+    calls = []
+    def slow_get(url, headers=None, **kw):
+        calls.append(url); time.sleep(0.2)
+        return SimpleNamespace(status_code=200, text='[]', headers={'Content-Type': 'application/json'}, raise_for_status=lambda: None)
+    monkeypatch.setattr(api, 'http_get', slow_get)
+    cache = api.CachedUpstream('http://countries.test/all', str(tmp_path / 'countries.json'), 3600)
+    bodies = []
+    def call():
+        with app.app_context():
+            bodies.append(cache.get()['body'])
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert bodies == ['[]'] * 8
+    assert len(calls) == 1
+
+
+def test_countries_etag_is_stored_with_the_entry(app, client, monkeypatch, tmp_path):
+    body = '[{"name": "x"}]'
+    monkeypatch.setattr(api, 'http_get', lambda url, headers=None, **kw: SimpleNamespace(
+        status_code=200, text=body, headers={'Content-Type': 'application/json'}, raise_for_status=lambda: None))
+    cache = api.CachedUpstream('http://countries.test/all', str(tmp_path / 'countries.json'), 3600)
+    monkeypatch.setitem(app.extensions, 'countries_cache', cache)
+    first = client.get('/proxy/countries')
+    digests = []
+    monkeypatch.setattr(api.hashlib, 'sha256', lambda data: digests.append(data))
+    again = client.get('/proxy/countries', headers={'If-None-Match': first.headers['ETag']})
+    assert (first.status_code, again.status_code) == (200, 304)
+    assert digests == []
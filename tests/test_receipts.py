@@ -0,0 +1,141 @@
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from decimal import Decimal
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+import app as api
+from app import db, Receipt
+from conftest import submit
+
+
+def echo_extractor(path, content_type):
+    return f'{content_type}\nTOTAL 12.50\n'
+
+
+ocr_gate = threading.Event()
+
+def gated_extractor(path, content_type):
+    ocr_gate.wait(5)
+    return echo_extractor(path, content_type)
+
+
+@pytest.fixture
+def store(app, monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'UPLOAD_FOLDER', str(tmp_path))
+    store = api.LocalBlobStore(str(tmp_path))
+    monkeypatch.setitem(app.extensions, 'blob_store', store)
+    return store
+
+
+def test_ocr_passes_the_content_type_to_the_extractor(store):
+    key = api.blob_key('ab' * 32)
+    store.put_bytes(key, b'%PDF-1.4')
+    out = api.ocr_receipt(f'{__name__}:echo_extractor', 'local', key, 'application/pdf')
+    assert out['ocr_text'].startswith('application/pdf')
+    assert out['ocr_amount'] == Decimal('12.50')
+
+
+def test_default_extractor_reads_pdfs_by_content_type_not_by_key(store, monkeypatch):
+    pypdf = ModuleType('pypdf')
+    pypdf.PdfReader = lambda path: SimpleNamespace(pages=[SimpleNamespace(extract_text=lambda: 'TOTAL 3.00')])
+    monkeypatch.setitem(sys.modules, 'pypdf', pypdf)
+    key = api.blob_key('cd' * 32)  # extensionless, like every stored blob
+    store.put_bytes(key, b'%PDF-1.4')
+    assert api.extract_receipt_text(store.path(key), 'application/pdf') == 'TOTAL 3.00'
+
+
+@pytest.fixture
+def image_receipt(app, client, company, store):
+    c = company()
+    eid = submit(client, c.employee)
+    sha = 'ef' * 32
+    store.put_bytes(api.blob_key(sha), b'not really a png')
+    with app.app_context():
+        r = Receipt(expense_id=eid, file_path=api.blob_key(sha), sha256=sha, size=16, content_type='image/png', status='done', created_at=datetime.utcnow())
+        db.session.add(r); db.session.commit()
+        return f'/receipts/{r.id}/file?thumb=128', c.employee.headers
+
+
+@pytest.mark.parametrize('error', [ImportError("No module named 'PIL'"), FutureTimeout()])
+def test_thumbnail_worker_failures_are_503(app, image_receipt, client, monkeypatch, error):
+    def fail(fn, *args, timeout=30):
+        raise error
+    monkeypatch.setattr(app.extensions['receipt_processor'], 'call', fail)
+    url, headers = image_receipt
+    assert client.get(url, headers=headers).status_code == 503
+
+
+def test_unreadable_image_thumbnail_is_415(app, image_receipt, client, monkeypatch):
+    pytest.importorskip('PIL')
+    monkeypatch.setattr(app.extensions['receipt_processor'], 'call', lambda fn, *args, timeout=30: fn(*args))
+    url, headers = image_receipt
+    assert client.get(url, headers=headers).status_code == 415
+
+
+@pytest.fixture
+def processor(app, monkeypatch):
+    """OCR on a thread instead of the process pool; the extractor waits for ocr_gate."""
+    ocr_gate.clear()
+    proc = api.ReceiptProcessor(flush_interval=0)
+    proc._pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setitem(app.extensions, 'receipt_processor', proc)
+    monkeypatch.setitem(app.config, 'RECEIPT_EXTRACTOR', f'{__name__}:gated_extractor')
+    yield proc
+    ocr_gate.set()
+    proc._pool.shutdown()
+
+
+def test_receipt_status_goes_from_queued_to_the_ocr_result(client, company, store, processor):
+    c = company()
+    eid = submit(client, c.employee)
+    r = client.post('/receipts/upload', data={"expense_id": str(eid), "file": (io.BytesIO(b'%PDF-1.4 receipt'), 'r.pdf')},
+                    headers=c.employee.headers, content_type='multipart/form-data')
+    assert r.status_code == 202
+    url = f"/receipts/{r.json['receipt_id']}"
+    queued = client.get(url, headers=c.employee.headers).json
+    assert (queued['status'], queued['queue_depth']) == ('queued', 1)
+
+    ocr_gate.set()
+    deadline = time.monotonic() + 5
+    while processor.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    done = client.get(url, headers=c.employee.headers).json
+    assert (done['status'], done['amount'], done['ocr_text'].split('\n')[0]) == ('done', '12.50', 'application/pdf')
+    assert 'queue_depth' not in done
+    assert client.get(url, headers=company().admin.headers).status_code == 404  # another company's receipt
+
+
+@pytest.fixture
+def pdf_receipt(app, client, company, store):
+    c = company()
+    eid = submit(client, c.employee)
+    body = b'%PDF-1.4 ' + bytes(range(256))
+    sha = api.hashlib.sha256(body).hexdigest()
+    store.put_bytes(api.blob_key(sha), body)
+    with app.app_context():
+        r = Receipt(expense_id=eid, file_path=api.blob_key(sha), sha256=sha, size=len(body), content_type='application/pdf', status='done', created_at=datetime.utcnow())
+        db.session.add(r); db.session.commit()
+        return SimpleNamespace(url=f'/receipts/{r.id}/file', headers=c.employee.headers, body=body, sha=sha)
+
+
+def test_receipt_download_has_a_content_etag_and_serves_ranges(client, pdf_receipt):
+    r = pdf_receipt
+    full = client.get(r.url, headers=r.headers)
+    assert (full.status_code, full.data, full.headers['ETag']) == (200, r.body, f'"{r.sha}"')
+    assert 'private' in full.headers['Cache-Control'] and 'immutable' in full.headers['Cache-Control']
+    part = client.get(r.url, headers={**r.headers, 'Range': 'bytes=4-9'})
+    assert (part.status_code, part.data, part.headers['Content-Range']) == (206, r.body[4:10], f'bytes 4-9/{len(r.body)}')
+    assert client.get(r.url, headers={**r.headers, 'Range': f'bytes={len(r.body)}-'}).status_code == 416
+
+
+def test_receipt_download_is_304_for_a_matching_etag(client, company, pdf_receipt):
+    r = pdf_receipt
+    assert client.get(r.url, headers={**r.headers, 'If-None-Match': f'"{r.sha}"'}).status_code == 304
+    assert client.get(r.url, headers={**r.headers, 'If-None-Match': '"other"'}).status_code == 200
+    assert client.get(r.url, headers={**company().admin.headers, 'If-None-Match': f'"{r.sha}"'}).status_code == 404
@@ -0,0 +1,57 @@
+import pytest
+
+import app as api
+from app import db, Expense
+from conftest import submit
+
+
+@pytest.fixture(autouse=True)
+def cache(app, monkeypatch):
+    monkeypatch.setitem(app.extensions, 'response_cache', api.MemoryResponseCache(maxsize=1000, ttl=60))
+
+
+def rename_behind_the_cache(app, expense_id):
+    """A write that does not bump the generation: only a cached response still shows the old value."""
+    with app.app_context():
+        Expense.query.filter_by(id=expense_id).update({"description": "renamed"})
+        db.session.commit()
+
+
+def my_expenses(client, who):
+    return [(e['id'], e['description']) for e in client.get('/expenses/my', headers=who.headers).json]
+
+
+def test_a_list_is_served_from_the_cache_until_a_write_bumps_its_generation(app, client, company):
+    c = company()
+    first = submit(client, c.employee, description='taxi')
+    assert my_expenses(client, c.employee) == [(first, 'taxi')]
+    rename_behind_the_cache(app, first)
+    assert my_expenses(client, c.employee) == [(first, 'taxi')]
+    second = submit(client, c.employee, description='hotel')
+    assert my_expenses(client, c.employee) == [(second, 'hotel'), (first, 'renamed')]
+
+
+def test_writes_to_another_company_or_scope_keep_the_entry(app, client, company, monkeypatch):
+    monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 4)
+    c, other = company(), company()
+    eid = submit(client, c.employee, description='taxi')
+    my_expenses(client, c.employee)
+    rename_behind_the_cache(app, eid)
+    submit(client, other.employee)
+    r = client.post('/users', json={"name": "new", "email": f"new@{c.id}.cache.test", "password": "pw", "role": "employee"},
+                    headers=c.admin.headers)
+    assert r.status_code == 201
+    assert my_expenses(client, c.employee) == [(eid, 'taxi')]
+
+
+def test_a_decision_refreshes_the_inbox_and_its_etag(client, company):
+    c = company()
+    approver = c.approvers[0]
+    submit(client, c.employee)
+    first = client.get('/approvals/pending', headers=approver.headers)
+    etag = {'If-None-Match': first.headers['ETag']}
+    assert client.get('/approvals/pending', headers={**approver.headers, **etag}).status_code == 304
+    r = client.post(f"/approvals/{first.json[0]['approval_id']}/decide", json={"action": "approve"}, headers=approver.headers)
+    assert r.status_code == 200
+    after = client.get('/approvals/pending', headers={**approver.headers, **etag})
+    assert (after.status_code, after.json) == (200, [])
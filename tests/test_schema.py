@@ -0,0 +1,37 @@
+from sqlalchemy import text
+
+import app as api
+from app import db
+
+
+LEGACY_TABLES = (
+    "CREATE TABLE company (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, country VARCHAR(100), currency VARCHAR(3), created_at DATETIME)",
+    "CREATE TABLE user (id INTEGER PRIMARY KEY, company_id INTEGER, name VARCHAR(150) NOT NULL, email VARCHAR(200) NOT NULL UNIQUE, "
+    "password_hash VARCHAR(200) NOT NULL, role VARCHAR(20), manager_id INTEGER, is_manager_approver BOOLEAN, created_at DATETIME)",
+    "CREATE TABLE expense (id INTEGER PRIMARY KEY, company_id INTEGER, user_id INTEGER, amount NUMERIC(12, 2) NOT NULL, currency VARCHAR(3) NOT NULL, "
+    "amount_in_company_currency NUMERIC(12, 2), category VARCHAR(100), description TEXT, expense_date DATE, status VARCHAR(20), created_at DATETIME)",
+    "CREATE TABLE audit_log (id INTEGER PRIMARY KEY, user_id INTEGER, action VARCHAR(255) NOT NULL, details TEXT, created_at DATETIME)",
+    "INSERT INTO company (id, name, currency) VALUES (1, 'old', 'USD')",
+    "INSERT INTO user (id, company_id, name, email, password_hash, role) VALUES (1, 1, 'a', 'a@old', 'x', 'admin')",
+    "INSERT INTO expense (id, company_id, user_id, amount, currency, amount_in_company_currency, category, status, created_at) "
+    "VALUES (1, 1, 1, 10, 'USD', 10, 'x', 'pending', '2024-01-02 00:00:00')",
+    "INSERT INTO audit_log (id, user_id, action) VALUES (1, 1, 'old')",
+)
+
+
+def test_upgrade_brings_a_legacy_database_up_to_the_models(tmp_path):
+    legacy = api.create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'legacy.db'}"})
+    with legacy.app_context():
+        with db.engine.begin() as conn:
+            for stmt in LEGACY_TABLES:
+                conn.execute(text(stmt))
+        assert any('ADD COLUMN version' in s for s in api.schema_upgrades(db.engine))
+
+        api.upgrade_database()
+        assert api.schema_upgrades(db.engine) == []
+        assert db.session.execute(text("SELECT version, approvals_total FROM expense")).one() == (0, None)
+        assert db.session.execute(text("SELECT company_id FROM audit_log")).scalar() == 1
+        assert db.session.execute(text("SELECT total, count FROM spend_rollup")).one() == (10, 1)
+
+        api.upgrade_database()  # idempotent
+        assert db.session.execute(text("SELECT count(*) FROM spend_rollup")).scalar() == 1
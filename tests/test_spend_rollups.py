@@ -0,0 +1,75 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import app as api
+from app import db, Approval, SpendRollup
+from conftest import submit
+
+GROUPINGS = ['category', 'user', 'month', 'status', 'category,user,month,status']
+
+
+def chain(app, eid):
+    with app.app_context():
+        return [a.id for a in Approval.query.filter_by(expense_id=eid).order_by(Approval.sequence_order)]
+
+
+def rollup_rows(app, company_id):
+    with app.app_context():
+        rows = SpendRollup.query.filter_by(company_id=company_id).all()
+        return {(r.month, r.category, r.user_id, r.status): (r.total, r.count) for r in rows if r.count}
+
+
+@pytest.fixture
+def history(app, client, company, deferred_refreshes, monkeypatch, tmp_path):
+    """A company whose expenses went through submit, decide, decide_batch and a rate backfill."""
+    c = company(approvers=2)
+    first, second = c.approvers
+    eids = [submit(client, c.employee, amount=a, category=cat, expense_date=d) for a, cat, d in [
+        ('10.00', 'travel', '2024-01-15'), ('20.50', 'travel', '2024-02-01'), ('7.25', 'meals', '2024-02-10'),
+        ('3.00', None, '2024-02-11'), ('99.99', 'meals', '2024-03-31'), ('1.00', 'travel', '2024-03-01')]]
+    nok = submit(client, c.employee, amount='40.00', currency='NOK', category='meals', expense_date='2024-01-20')
+    assert deferred_refreshes == [('NOK', True)]
+    steps = {e: chain(app, e) for e in eids + [nok]}
+
+    for e in eids[:4] + [nok]:
+        assert client.post(f'/approvals/{steps[e][0]}/decide', json={"action": "approve"}, headers=first.headers).status_code == 200
+    assert client.post(f'/approvals/{steps[eids[4]][0]}/decide', json={"action": "reject"}, headers=first.headers).status_code == 200
+    r = client.post('/approvals/decide_batch', headers=second.headers, json={"decisions": [
+        {"approval_id": steps[eids[0]][1], "action": "approve"},
+        {"approval_id": steps[eids[1]][1], "action": "reject"},
+        {"approval_id": steps[nok][1], "action": "approve"}]})
+    assert [x.get('final_status') for x in r.json['results']] == ['approved', 'rejected', 'approved']
+
+    rates = tmp_path / 'rates.json'
+    rates.write_text(json.dumps({"NOK": {"date": date.today().isoformat(), "rates": {"USD": 0.1}}}))
+    monkeypatch.undo()
+    monkeypatch.setitem(app.config, 'RATE_PROVIDER', f'file:{rates}')
+    with app.app_context():
+        assert api.refresh_rates('NOK', wait=True, timeout=10).is_set()
+    return c
+
+
+def test_rollups_match_the_live_report_and_a_rebuild(app, client, history):
+    for group_by in GROUPINGS:
+        reports = [client.get(f'/reports/spend?group_by={group_by}&source={source}', headers=history.admin.headers)
+                   for source in ('rollup', 'live')]
+        assert [r.status_code for r in reports] == [200, 200], group_by
+        rollup, live = (r.json['rows'] for r in reports)
+        assert rollup == live, group_by
+        assert sum(r['count'] for r in rollup) == 7
+
+    incremental = rollup_rows(app, history.id)
+    assert sum(total for total, _ in incremental.values()) == Decimal('145.74')  # the NOK expense was backfilled
+    with app.app_context():
+        api.rebuild_spend_rollups(history.id)
+        db.session.commit()
+    assert rollup_rows(app, history.id) == incremental
+
+
+@pytest.mark.parametrize('query', ['user_id=abc', 'user_id=1.5'])
+def test_spend_report_rejects_a_malformed_user_id(client, company, query):
+    c = company()
+    assert client.get(f'/reports/spend?{query}', headers=c.admin.headers).status_code == 400
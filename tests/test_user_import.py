@@ -0,0 +1,42 @@
+import pytest
+
+from app import db, User
+
+
+@pytest.fixture
+def hashed(app, monkeypatch):
+    """Record hash_many() calls instead of hashing on the process pool."""
+    calls = []
+    def hash_many(passwords, rounds):
+        calls.append((rounds, db.session().in_transaction()))
+        return ['hash-' + p for p in passwords]
+    monkeypatch.setattr(app.extensions['password_hasher'], 'hash_many', hash_many)
+    return calls
+
+
+def test_rows_with_non_text_fields_are_reported_not_a_500(client, company, hashed):
+    c = company()
+    r = client.post('/users/import', headers=c.admin.headers, json={"users": [
+        {"name": 1, "email": "a@import.test", "password": "pw"},
+        {"name": "B", "email": "b@import.test", "password": 1234},
+        {"name": "C", "email": ["c"], "password": "pw", "manager_email": 5},
+        {"name": "D", "email": "d@import.test", "password": "pw", "is_manager_approver": 1}]})
+    assert r.status_code == 400
+    assert r.json['errors'] == [
+        {"row": 0, "email": "a@import.test", "error": "name must be text"},
+        {"row": 1, "email": "b@import.test", "error": "password must be text"},
+        {"row": 2, "email": "", "error": "email, manager_email must be text"}]
+    assert hashed == []
+
+
+def test_import_hashes_at_the_normal_cost_unless_told_otherwise(app, client, company, hashed, monkeypatch):
+    c = company()
+    users = [{"name": "E", "email": f"e{c.id}@import.test", "password": "pw"}]
+    assert client.post('/users/import', json={"users": users}, headers=c.admin.headers).status_code == 201
+    monkeypatch.setitem(app.config, 'IMPORT_BCRYPT_ROUNDS', 4)
+    users = [{"name": "F", "email": f"f{c.id}@import.test", "password": "pw"}]
+    assert client.post('/users/import', json={"users": users}, headers=c.admin.headers).status_code == 201
+    # no transaction (and so no pooled connection) is held while hashing
+    assert hashed == [(app.config['BCRYPT_LOG_ROUNDS'], False), (4, False)]
+    with app.app_context():
+        assert User.query.filter_by(email=f"e{c.id}@import.test").one().password_hash == 'hash-pw'